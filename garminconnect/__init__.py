@@ -2,31 +2,251 @@
 
 """Python 3 API wrapper for Garmin Connect to get your statistics."""
 
+import asyncio
+import functools
+import inspect
 import json
 import logging
+import os
+import pickle
 import re
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, auto
-from typing import Any, Dict
+from http.cookies import Morsel
+from typing import TYPE_CHECKING, Any, Dict, Union
 
 import cloudscraper
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    # Needs msgspec, only imported when a typed response is requested
+    from . import structs
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    # HTTP/2 needs httpx with its http2 extra
+    import h2  # noqa: F401
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    # Lets urllib3 and aiohttp decode brotli compressed responses
+    import brotli
+except ImportError:
+    brotli = None
 
 
 logger = logging.getLogger(__name__)
 
+POOL_SIZE = 32
+
+_CSRF_RE = re.compile(r'name="_csrf" value="(\w*)')
+_TICKET_RE = re.compile(r"\?ticket=([\w-]*)")
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _tune_adapter(adapter, status_forcelist=(500, 502, 503, 504)):
+    """Keep enough connections alive for concurrent calls and retry transient errors."""
+    # 429 is not retried, so rate limiting raises GarminConnectTooManyRequestsError
+    # at once, and Retry-After is ignored to keep the backoff bounded
+    adapter.max_retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=status_forcelist,
+        allowed_methods=["GET", "POST"],
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter.init_poolmanager(POOL_SIZE, POOL_SIZE, block=False)
+
+
+@functools.lru_cache(maxsize=8)
+def _json_keys_re(keys):
+    """Return the regex matching 'KEY = {' for any of 'keys'."""
+    return re.compile("(" + "|".join(map(re.escape, keys)) + r") = \{")
+
+
+def _get_json_multi(page_html, keys):
+    """Return the json objects assigned to 'keys' in the page, scanning it once."""
+    found = dict.fromkeys(keys)
+    missing = set(keys)
+    pattern = _json_keys_re(tuple(keys))
+    pos = 0
+    while missing:
+        match = pattern.search(page_html, pos)
+        if not match:
+            break
+
+        # Decodes in C and returns where the object ends, to resume from there
+        value, pos = _JSON_DECODER.raw_decode(page_html, match.end() - 1)
+
+        key = match.group(1)
+        if key in missing:
+            found[key] = value
+            missing.discard(key)
+
+    return found
+
+
+def _iter_content(response, chunk_size):
+    """Yield the body of a streamed response in chunks, closing it when done."""
+    with response:
+        yield from response.iter_content(chunk_size)
+
+
+async def _aiter_content(response, chunk_size):
+    """Yield the body of an aiohttp response in chunks, releasing it when done."""
+    async with response:
+        async for chunk in response.content.iter_chunked(chunk_size):
+            yield chunk
+
+
+def _require_msgspec():
+    """Raise a helpful ImportError when msgspec is not installed."""
+    if msgspec is None:
+        raise ImportError(
+            "msgspec is required for typed responses, "
+            "install it with: pip3 install garminconnect[structs]"
+        )
+
+
+def _write_chunks(chunks, dest):
+    """Write chunks to a path or a binary file object."""
+    if hasattr(dest, "write"):
+        for chunk in chunks:
+            dest.write(chunk)
+        return
+
+    with open(dest, "wb") as fp:
+        for chunk in chunks:
+            fp.write(chunk)
+
+
+# Number of cached responses kept per Garmin instance
+CACHE_SIZE = 256
+
+
+def _sweep_cache(cache, now):
+    """
+    Drop the expired entries, then the oldest ones while 'cache' is full.
+    The caller holds the cache lock.
+    """
+    for key in [key for key, (expires, _) in cache.items() if expires <= now]:
+        del cache[key]
+
+    while len(cache) >= CACHE_SIZE:
+        del cache[next(iter(cache))]
+
+
+def _shared(value):
+    """Return a cached value, shielding a task from cancelled callers."""
+    if isinstance(value, asyncio.Future):
+        # Cancelling one waiter must not cancel the request the others await
+        return asyncio.shield(value)
+
+    return value
+
+
+def ttl_cache(seconds):
+    """
+    Cache the results of a Garmin method per arguments for 'seconds'.
+    Every caller gets the same cached object, so don't modify it in place.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with self._cache_lock:
+                cached = self._cache.pop(key, None)
+                if cached is not None and cached[0] > now:
+                    # Reinsert to keep the dict ordered from least recently used
+                    self._cache[key] = cached
+                    return _shared(cached[1])
+
+                if len(self._cache) >= CACHE_SIZE:
+                    _sweep_cache(self._cache, now)
+
+            value = func(self, *args, **kwargs)
+            if inspect.isawaitable(value):
+                # A task can be awaited by every caller, unlike a coroutine
+                value = asyncio.ensure_future(value)
+
+                def evict_failed(task):
+                    if task.cancelled() or task.exception() is not None:
+                        with self._cache_lock:
+                            if self._cache.get(key, (None, None))[1] is task:
+                                del self._cache[key]
+
+                value.add_done_callback(evict_failed)
+
+            with self._cache_lock:
+                self._cache[key] = (now + seconds, value)
+            return _shared(value)
+
+        return wrapper
+
+    return decorator
+
+
+class GarminConnectConnectionError(Exception):
+    """Raised when communication ended in error."""
+
+
+class GarminConnectTooManyRequestsError(Exception):
+    """Raised when rate limit is exceeded."""
+
+
+class GarminConnectAuthenticationError(Exception):
+    """Raised when authentication is failed."""
+
 
 class ApiClient:
     """Class for a single API endpoint."""
 
     default_headers = {
         # 'User-agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/535.2 (KHTML, like Gecko) Chrome/15.0.874.121 Safari/535.2'
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.14; rv:66.0) Gecko/20100101 Firefox/66.0"
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.14; rv:66.0) Gecko/20100101 Firefox/66.0",
+        "Connection": "keep-alive",
+        "Accept-Encoding": "br, gzip, deflate" if brotli else "gzip, deflate",
+    }
+
+    # Seconds to wait for connecting and between received bytes
+    DEFAULT_TIMEOUT = (5, 30)
+
+    # Exception and message raised for the status codes with a meaning of their own
+    _STATUS_EXC = {
+        429: (GarminConnectTooManyRequestsError, "Too many requests"),
+        401: (GarminConnectAuthenticationError, "Authentication error"),
+        403: (GarminConnectConnectionError, "Forbidden url: {url}"),
     }
 
     def __init__(self, session, baseurl, headers=None, aditional_headers=None):
         """Return a new Client instance."""
         self.session = session
         self.baseurl = baseurl
+        self._base_url = f"https://{baseurl}"
+        # httpx client used instead of the session when set, for HTTP/2
+        self.http = None
 
         if headers:
             self.headers = headers
@@ -49,66 +269,231 @@ class ApiClient:
     def url(self, addurl=None):
         """Return the url for the API endpoint."""
 
-        path = f"https://{self.baseurl}"
-        if addurl is not None:
-            path += f"/{addurl}"
+        if addurl is None:
+            return self._base_url
+
+        return self._base_url + "/" + addurl
 
-        return path
+    def _raise_for_status(self, url, err, status_code=None):
+        """Raise the Garmin exception for a failed request to 'url'."""
+        if status_code in self._STATUS_EXC:
+            exc, message = self._STATUS_EXC[status_code]
+            raise exc(message.format(url=url)) from err
+
+        raise GarminConnectConnectionError(err) from err
+
+    def _request(self, method, url, **kwargs):
+        """Send a request with the httpx client if set, else with the session."""
+        if self.http is not None:
+            return self.http.request(method, url, **kwargs)
+
+        return self.session.request(
+            method, url, timeout=self.DEFAULT_TIMEOUT, **kwargs
+        )
 
     def get(self, addurl, aditional_headers=None, params=None):
         """Make an API call using the GET method."""
-        total_headers = self.headers.copy()
-        if aditional_headers:
-            total_headers.update(aditional_headers)
+        # requests does not modify the headers, so no copy is needed without extras
+        total_headers = (
+            {**self.headers, **aditional_headers} if aditional_headers else self.headers
+        )
         url = self.url(addurl)
 
         logger.debug("URL: %s", url)
         logger.debug("Headers: %s", total_headers)
 
+        response = None
         try:
-            response = self.session.get(url, headers=total_headers, params=params)
+            response = self._request(
+                "GET", url, headers=total_headers, params=params
+            )
             response.raise_for_status()
             # logger.debug("Response: %s", response.content)
             return response
         except Exception as err:
-            logger.debug("Response in exception: %s", response.content)
-            if response.status_code == 429:
-                raise GarminConnectTooManyRequestsError("Too many requests") from err
-            if response.status_code == 401:
-                raise GarminConnectAuthenticationError("Authentication error") from err
-            if response.status_code == 403:
-                raise GarminConnectConnectionError(f"Forbidden url: {url}") from err
+            status_code = None
+            if response is not None:
+                logger.debug("Response in exception: %s", response.content)
+                status_code = response.status_code
+            self._raise_for_status(url, err, status_code)
+
+    def get_json(self, addurl, aditional_headers=None, params=None):
+        """Make an API call using the GET method and return the decoded json."""
+        return _loads(self.get(addurl, aditional_headers, params).content)
+
+    def get_struct(self, addurl, struct_type, aditional_headers=None, params=None):
+        """Make an API call using the GET method and decode it into 'struct_type'."""
+        _require_msgspec()
+        return msgspec.json.decode(
+            self.get(addurl, aditional_headers, params).content, type=struct_type
+        )
+
+    def get_stream(self, addurl, aditional_headers=None, params=None):
+        """Make an API call using the GET method, without reading the body yet."""
+        total_headers = (
+            {**self.headers, **aditional_headers} if aditional_headers else self.headers
+        )
+        url = self.url(addurl)
+
+        logger.debug("URL: %s", url)
 
-            raise GarminConnectConnectionError(err) from err
+        response = None
+        try:
+            response = self.session.get(
+                url,
+                headers=total_headers,
+                params=params,
+                stream=True,
+                timeout=self.DEFAULT_TIMEOUT,
+            )
+            response.raise_for_status()
+            return response
+        except Exception as err:
+            status_code = None
+            if response is not None:
+                status_code = response.status_code
+                response.close()
+            self._raise_for_status(url, err, status_code)
 
     def post(self, addurl, aditional_headers, params, data):
         """Make an API call using the POST method."""
-        total_headers = self.headers.copy()
-        if aditional_headers:
-            total_headers.update(aditional_headers)
+        total_headers = (
+            {**self.headers, **aditional_headers} if aditional_headers else self.headers
+        )
         url = self.url(addurl)
 
         logger.debug("URL: %s", url)
         logger.debug("Headers: %s", total_headers)
         logger.debug("Data: %s", data)
 
+        response = None
         try:
-            response = self.session.post(
-                url, headers=total_headers, params=params, data=data
+            response = self._request(
+                "POST", url, headers=total_headers, params=params, data=data
             )
             response.raise_for_status()
             # logger.debug("Response: %s", response.content)
             return response
         except Exception as err:
-            logger.debug("Response in exception: %s", response.content)
-            if response.status_code == 429:
-                raise GarminConnectTooManyRequestsError("Too many requests") from err
-            if response.status_code == 401:
-                raise GarminConnectAuthenticationError("Authentication error") from err
-            if response.status_code == 403:
-                raise GarminConnectConnectionError(f"Forbidden url: {url}") from err
+            status_code = None
+            if response is not None:
+                logger.debug("Response in exception: %s", response.content)
+                status_code = response.status_code
+            self._raise_for_status(url, err, status_code)
 
-            raise GarminConnectConnectionError(err) from err
+
+class AsyncApiClient(ApiClient):
+    """Class for a single API endpoint, fetching data with aiohttp.
+
+    The login flow keeps using the synchronous methods inherited from
+    ApiClient, get_json and get_content are coroutines sharing its cookies.
+    """
+
+    def __init__(self, session, baseurl, headers=None, aditional_headers=None):
+        """Return a new Client instance."""
+        if aiohttp is None:
+            raise ImportError(
+                "aiohttp is required for asyncio support, "
+                "install it with: pip3 install garminconnect[async]"
+            )
+        super().__init__(session, baseurl, headers, aditional_headers)
+        self._session = None
+
+    async def _ensure_session(self):
+        """Return the aiohttp session, creating it from the current cookies."""
+        if self._session is None or self._session.closed:
+            cookie_jar = aiohttp.CookieJar()
+            for cookie in self.session.cookies:
+                morsel = Morsel()
+                morsel.set(cookie.name, cookie.value or "", cookie.value or "")
+                morsel["domain"] = cookie.domain
+                morsel["path"] = cookie.path
+                cookie_jar.update_cookies({cookie.name: morsel})
+
+            connect_timeout, read_timeout = self.DEFAULT_TIMEOUT
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                cookie_jar=cookie_jar,
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=connect_timeout, sock_read=read_timeout
+                ),
+            )
+
+        return self._session
+
+    async def get_content(self, addurl, aditional_headers=None, params=None):
+        """Make an API call using the GET method and return the raw bytes."""
+        session = await self._ensure_session()
+        url = self.url(addurl)
+
+        logger.debug("URL: %s", url)
+
+        try:
+            async with session.get(
+                url, headers=aditional_headers, params=params
+            ) as response:
+                response.raise_for_status()
+                return await response.read()
+        except aiohttp.ClientResponseError as err:
+            self._raise_for_status(url, err, err.status)
+        except aiohttp.ClientError as err:
+            self._raise_for_status(url, err)
+
+    async def get_stream(self, addurl, aditional_headers=None, params=None):
+        """Make an API call using the GET method, without reading the body yet."""
+        session = await self._ensure_session()
+        url = self.url(addurl)
+
+        logger.debug("URL: %s", url)
+
+        response = None
+        try:
+            response = await session.get(url, headers=aditional_headers, params=params)
+            response.raise_for_status()
+            return response
+        except aiohttp.ClientError as err:
+            if response is not None:
+                response.release()
+            self._raise_for_status(url, err, getattr(err, "status", None))
+
+    async def get_json(self, addurl, aditional_headers=None, params=None):
+        """Make an API call using the GET method and return the decoded json."""
+        return _loads(await self.get_content(addurl, aditional_headers, params))
+
+    async def get_struct(
+        self, addurl, struct_type, aditional_headers=None, params=None
+    ):
+        """Make an API call using the GET method and decode it into 'struct_type'."""
+        _require_msgspec()
+        return msgspec.json.decode(
+            await self.get_content(addurl, aditional_headers, params), type=struct_type
+        )
+
+    def sync_cookies(self):
+        """Copy the cookies set or rotated during the async calls back to the session."""
+        if self._session is None:
+            return
+
+        # aiohttp drops the leading dot of domains, keep the one the session uses
+        domains = {
+            (cookie.name, cookie.domain.lstrip(".")): cookie.domain
+            for cookie in self.session.cookies
+        }
+        for morsel in self._session.cookie_jar:
+            domain = morsel["domain"]
+            self.session.cookies.set(
+                morsel.key,
+                morsel.value,
+                domain=domains.get((morsel.key, domain), domain),
+                path=morsel["path"] or "/",
+            )
+
+    async def close(self):
+        """Close the aiohttp session, a new one is created on next use."""
+        if self._session is not None:
+            self.sync_cookies()
+            await self._session.close()
+            self._session = None
 
 
 class Garmin:
@@ -117,6 +502,9 @@ class Garmin:
     def __init__(self, email, password, is_cn=False, session_data=None):
         """Create a new class instance."""
         self.session_data = session_data
+        self._cache = {}
+        # The cached methods are also called from worker threads
+        self._cache_lock = threading.Lock()
 
         self.username = email
         self.password = password
@@ -201,32 +589,140 @@ class Garmin:
 
         self.garmin_headers = {"NK": "NT"}
 
-        self.session = cloudscraper.CloudScraper()
+        self._auth_session = cloudscraper.CloudScraper()
+        # Tune cloudscraper's own adapter, mounting a new one would drop its cipher suite.
+        # Cloudflare challenges come as 429 or 503, leave them to cloudscraper
+        _tune_adapter(self._auth_session.get_adapter("https://"), status_forcelist=())
+
+        # Only the login needs cloudscraper, the API calls share its cookies
+        # but skip its per request challenge handling
+        self.session = requests.Session()
+        self.session.cookies = self._auth_session.cookies
+        adapter = requests.adapters.HTTPAdapter()
+        _tune_adapter(adapter)
+        self.session.mount("https://", adapter)
+
         self.sso_rest_client = ApiClient(
-            self.session,
+            self._auth_session,
             self.garmin_connect_sso_url,
             aditional_headers=self.garmin_headers,
         )
+        self._modern_auth_client = ApiClient(
+            self._auth_session,
+            self.garmin_connect_modern_url,
+            aditional_headers=self.garmin_headers,
+        )
         self.modern_rest_client = ApiClient(
             self.session,
             self.garmin_connect_modern_url,
             aditional_headers=self.garmin_headers,
         )
 
+        # Multiplex the API calls over HTTP/2 when httpx is installed, sharing
+        # the cookie jar with the sessions. httpx only retries failed connections,
+        # not the 5xx responses the session adapter retries
+        self._http = None
+        if httpx is not None:
+            connect_timeout, read_timeout = ApiClient.DEFAULT_TIMEOUT
+            self._http = httpx.Client(
+                cookies=self.session.cookies,
+                # requests follows redirects by default, httpx does not
+                follow_redirects=True,
+                transport=httpx.HTTPTransport(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=16, max_connections=POOL_SIZE
+                    ),
+                    retries=3,
+                ),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+            self.modern_rest_client.http = self._http
+
         self.display_name = None
         self.full_name = None
         self.unit_system = None
 
-    @staticmethod
-    def __get_json(page_html, key):
-        """Return json from text."""
+    @property
+    def display_name(self):
+        """Return the display name of the logged in user."""
 
-        found = re.search(key + r" = (\{.*\});", page_html, re.M)
-        if found:
-            json_text = found.group(1).replace('\\"', '"')
-            return json.loads(json_text)
+        return self._display_name
 
-        return None
+    @display_name.setter
+    def display_name(self, display_name):
+        self._display_name = display_name
+        self._bind_user_urls()
+
+    def _bind_user_urls(self):
+        """Build the urls including the display name once, instead of per request."""
+
+        self._url_summary = (
+            f"{self.garmin_connect_daily_summary_url}/{self.display_name}"
+        )
+        self._url_steps = (
+            f"{self.garmin_connect_user_summary_chart}/{self.display_name}"
+        )
+        self._url_heart_rates = (
+            f"{self.garmin_connect_heartrates_daily_url}/{self.display_name}"
+        )
+        self._url_personal_record = (
+            f"{self.garmin_connect_personal_record_url}/{self.display_name}"
+        )
+        self._url_sleep = f"{self.garmin_connect_daily_sleep_url}/{self.display_name}"
+        self._url_rhr = f"{self.garmin_connect_rhr}/{self.display_name}"
+
+    def invalidate_cache(self, prefix=None):
+        """Drop cached responses, only for methods starting with 'prefix' if given."""
+
+        with self._cache_lock:
+            if prefix is None:
+                self._cache.clear()
+                return
+
+            for key in [key for key in self._cache if key[0].startswith(prefix)]:
+                del self._cache[key]
+
+    def save_state(self, path):
+        """
+        Save the session cookies and user profile to 'path', readable by the
+        current user only, to restore them with from_state.
+        """
+
+        state = {
+            "cookies": list(self.session.cookies),
+            "display_name": self.display_name,
+            "full_name": self.full_name,
+            "unit_system": self.unit_system,
+        }
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # The mode above only applies when creating the file, not when overwriting
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, 0o600)
+        with open(fd, "wb") as fp:
+            pickle.dump(state, fp)
+
+    @classmethod
+    def from_state(cls, path, email, password, is_cn=False):
+        """
+        Return a new instance with the state saved by save_state restored.
+        Calling login() then checks the restored session, and only signs in
+        again when it has expired. The file is unpickled, so only load files
+        saved by yourself.
+        """
+
+        with open(path, "rb") as fp:
+            state = pickle.load(fp)
+
+        session_data = {"display_name": state["display_name"]}
+        api = cls(email, password, is_cn, session_data=session_data)
+        for cookie in state["cookies"]:
+            api.session.cookies.set_cookie(cookie)
+        api.display_name = state["display_name"]
+        api.full_name = state["full_name"]
+        api.unit_system = state["unit_system"]
+
+        return api
 
     def login(self):
         if self.session_data is None:
@@ -238,13 +734,15 @@ class Garmin:
         logger.debug("login with cookies")
 
         session_display_name = self.session_data["display_name"]
-        logger.debug("Set cookies in session")
-        self.modern_rest_client.set_cookies(
-            requests.utils.cookiejar_from_dict(self.session_data["session_cookies"])
-        )
-        self.sso_rest_client.set_cookies(
-            requests.utils.cookiejar_from_dict(self.session_data["login_cookies"])
-        )
+        # Without cookies in session_data they were restored by from_state
+        if "session_cookies" in self.session_data:
+            logger.debug("Set cookies in session")
+            self.modern_rest_client.set_cookies(
+                requests.utils.cookiejar_from_dict(self.session_data["session_cookies"])
+            )
+            self.sso_rest_client.set_cookies(
+                requests.utils.cookiejar_from_dict(self.session_data["login_cookies"])
+            )
 
         logger.debug("Get page data with cookies")
         params = {
@@ -260,7 +758,10 @@ class Garmin:
             logger.debug("Session expired, authenticating again!")
             return self.authenticate()
 
-        user_prefs = self.__get_json(response.text, "VIEWER_USERPREFERENCES")
+        page_json = _get_json_multi(
+            response.text, ("VIEWER_USERPREFERENCES", "VIEWER_SOCIAL_PROFILE")
+        )
+        user_prefs = page_json["VIEWER_USERPREFERENCES"]
         if user_prefs is None:
             logger.debug("Session expired, authenticating again!")
             return self.authenticate()
@@ -271,7 +772,7 @@ class Garmin:
         self.unit_system = user_prefs["measurementSystem"]
         logger.debug("Unit system is %s", self.unit_system)
 
-        social_profile = self.__get_json(response.text, "VIEWER_SOCIAL_PROFILE")
+        social_profile = page_json["VIEWER_SOCIAL_PROFILE"]
         self.full_name = social_profile["fullName"]
         logger.debug("Fullname is %s", self.full_name)
 
@@ -285,6 +786,7 @@ class Garmin:
         """Login to Garmin Connect."""
 
         logger.debug("login: %s %s", self.username, self.password)
+        self.invalidate_cache()
         self.modern_rest_client.clear_cookies()
         self.sso_rest_client.clear_cookies()
 
@@ -329,7 +831,7 @@ class Garmin:
             self.garmin_connect_sso_login, get_headers, params
         )
 
-        found = re.search(r"name=\"_csrf\" value=\"(\w*)", response.text, re.M)
+        found = _CSRF_RE.search(response.text)
         if not found:
             logger.error("_csrf not found  (%d)", response.status_code)
             return False
@@ -354,22 +856,25 @@ class Garmin:
             self.garmin_connect_sso_login, post_headers, params, data
         )
 
-        found = re.search(r"\?ticket=([\w-]*)", response.text, re.M)
+        found = _TICKET_RE.search(response.text)
         if not found:
             logger.error("Login ticket not found (%d).", response.status_code)
             return False
         params = {"ticket": found.group(1)}
 
-        response = self.modern_rest_client.get("", params=params)
+        response = self._modern_auth_client.get("", params=params)
 
-        user_prefs = self.__get_json(response.text, "VIEWER_USERPREFERENCES")
+        page_json = _get_json_multi(
+            response.text, ("VIEWER_USERPREFERENCES", "VIEWER_SOCIAL_PROFILE")
+        )
+        user_prefs = page_json["VIEWER_USERPREFERENCES"]
         self.display_name = user_prefs["displayName"]
         logger.debug("Display name is %s", self.display_name)
 
         self.unit_system = user_prefs["measurementSystem"]
         logger.debug("Unit system is %s", self.unit_system)
 
-        social_profile = self.__get_json(response.text, "VIEWER_SOCIAL_PROFILE")
+        social_profile = page_json["VIEWER_SOCIAL_PROFILE"]
         self.full_name = social_profile["fullName"]
         logger.debug("Fullname is %s", self.full_name)
 
@@ -397,48 +902,62 @@ class Garmin:
 
         return self.unit_system
 
-    def get_stats(self, cdate: str) -> Dict[str, Any]:
+    def get_stats(
+        self, cdate: str, strict=False
+    ) -> Union[Dict[str, Any], "structs.UserSummary"]:
         """Return user activity summary for 'cdate' format 'YYYY-mm-dd' (compat for garminconnect)."""
 
-        return self.get_user_summary(cdate)
+        return self.get_user_summary(cdate, strict=strict)
 
-    def get_user_summary(self, cdate: str) -> Dict[str, Any]:
-        """Return user activity summary for 'cdate' format 'YYYY-mm-dd'."""
+    def _user_summary_request(self, cdate, strict):
+        """Return the url, params and struct type, None for json, of a user summary."""
 
-        url = f"{self.garmin_connect_daily_summary_url}/{self.display_name}"
         params = {
             "calendarDate": str(cdate),
         }
-        logger.debug("Requesting user summary")
+        struct_type = None
+        if strict:
+            _require_msgspec()
+            from .structs import UserSummary
 
-        response = self.modern_rest_client.get(url, params=params).json()
+            struct_type = UserSummary
 
-        if response["privacyProtected"] is True:
-            raise GarminConnectAuthenticationError("Authentication error")
+        return self._url_summary, params, struct_type
 
-        return response
+    @staticmethod
+    def _check_user_summary(response):
+        """Return the user summary, raising if it is privacy protected."""
 
-    def get_steps_data(self, cdate):
-        """Fetch available steps data 'cDate' format 'YYYY-mm-dd'."""
+        if isinstance(response, dict):
+            privacy_protected = response["privacyProtected"]
+        else:
+            privacy_protected = response.privacy_protected
 
-        url = f"{self.garmin_connect_user_summary_chart}/{self.display_name}"
-        params = {
-            "date": str(cdate),
-        }
-        logger.debug("Requesting steps data")
+        if privacy_protected is True:
+            raise GarminConnectAuthenticationError("Authentication error")
 
-        return self.modern_rest_client.get(url, params=params).json()
+        return response
 
-    def get_heart_rates(self, cdate):  #
-        """Fetch available heart rates data 'cDate' format 'YYYY-mm-dd'."""
+    @ttl_cache(seconds=10)
+    def get_user_summary(
+        self, cdate: str, strict=False
+    ) -> Union[Dict[str, Any], "structs.UserSummary"]:
+        """
+        Return user activity summary for 'cdate' format 'YYYY-mm-dd'.
+        With 'strict' return it as a structs.UserSummary, needs msgspec.
+        """
 
-        url = f"{self.garmin_connect_heartrates_daily_url}/{self.display_name}"
-        params = {
-            "date": str(cdate),
-        }
-        logger.debug("Requesting heart rates")
+        url, params, struct_type = self._user_summary_request(cdate, strict)
+        logger.debug("Requesting user summary")
 
-        return self.modern_rest_client.get(url, params=params).json()
+        if struct_type is not None:
+            response = self.modern_rest_client.get_struct(
+                url, struct_type, params=params
+            )
+        else:
+            response = self.modern_rest_client.get_json(url, params=params)
+
+        return self._check_user_summary(response)
 
     def get_stats_and_body(self, cdate):
         """Return activity data and body composition (compat for garminconnect)."""
@@ -448,172 +967,25 @@ class Garmin:
             **self.get_body_composition(cdate)["totalAverage"],
         }
 
-    def get_body_composition(self, startdate: str, enddate=None) -> Dict[str, Any]:
-        """Return available body composition data for 'startdate' format 'YYYY-mm-dd' through enddate 'YYYY-mm-dd'."""
-
-        if enddate is None:
-            enddate = startdate
-        url = self.garmin_connect_weight_url
-        params = {"startDate": str(startdate), "endDate": str(enddate)}
-        logger.debug("Requesting body composition")
-
-        return self.modern_rest_client.get(url, params=params).json()
-
-    def get_max_metrics(self, cdate: str) -> Dict[str, Any]:
-        """Return available max metric data for 'cdate' format 'YYYY-mm-dd'."""
-
-        url = f"{self.garmin_connect_metrics_url}/{cdate}/{cdate}"
-        logger.debug("Requesting max metrics")
-
-        return self.modern_rest_client.get(url).json()
-
-    def get_hydration_data(self, cdate: str) -> Dict[str, Any]:
-        """Return available hydration data 'cdate' format 'YYYY-mm-dd'."""
-
-        url = f"{self.garmin_connect_daily_hydration_url}/{cdate}"
-        logger.debug("Requesting hydration data")
-
-        return self.modern_rest_client.get(url).json()
-
-    def get_respiration_data(self, cdate: str) -> Dict[str, Any]:
-        """Return available respiration data 'cdate' format 'YYYY-mm-dd'."""
-
-        url = f"{self.garmin_connect_daily_respiration_url}/{cdate}"
-        logger.debug("Requesting respiration data")
-
-        return self.modern_rest_client.get(url).json()
-
-    def get_spo2_data(self, cdate: str) -> Dict[str, Any]:
-        """Return available SpO2 data 'cdate' format 'YYYY-mm-dd'."""
-
-        url = f"{self.garmin_connect_daily_spo2_url}/{cdate}"
-        logger.debug("Requesting SpO2 data")
-
-        return self.modern_rest_client.get(url).json()
-
-    def get_personal_record(self) -> Dict[str, Any]:
-        """Return personal records for current user."""
-
-        url = f"{self.garmin_connect_personal_record_url}/{self.display_name}"
-        logger.debug("Requesting personal records for user")
-
-        return self.modern_rest_client.get(url).json()
-
-    def get_earned_badges(self) -> Dict[str, Any]:
-        """Return earned badges for current user."""
-
-        url = self.garmin_connect_earned_badges_url
-        logger.debug("Requesting earned badges for user")
-
-        return self.modern_rest_client.get(url).json()
-
-    def get_adhoc_challenges(self, start, limit) -> Dict[str, Any]:
-        """Return adhoc challenges for current user."""
-
-        url = self.garmin_connect_adhoc_challenges_url
-        params = {"start": str(start), "limit": str(limit)}
-        logger.debug("Requesting adhoc challenges for user")
-
-        return self.modern_rest_client.get(url, params=params).json()
-
-    def get_badge_challenges(self, start, limit) -> Dict[str, Any]:
-        """Return badge challenges for current user."""
-
-        url = self.garmin_connect_badge_challenges_url
-        params = {"start": str(start), "limit": str(limit)}
-        logger.debug("Requesting badge challenges for user")
-
-        return self.modern_rest_client.get(url, params=params).json()
-
-    def get_available_badge_challenges(self, start, limit) -> Dict[str, Any]:
-        """Return available badge challenges."""
-
-        url = self.garmin_connect_available_badge_challenges_url
-        params = {"start": str(start), "limit": str(limit)}
-        logger.debug("Requesting available badge challenges")
-        
-        return self.modern_rest_client.get(url, params=params).json()
-
-    def get_non_completed_badge_challenges(self, start, limit) -> Dict[str, Any]:
-        """Return badge non-completed challenges for current user."""
-
-        url = self.garmin_connect_non_completed_badge_challenges_url
-        params = {"start": str(start), "limit": str(limit)}
-        logger.debug("Requesting badge challenges for user")
-
-        return self.modern_rest_client.get(url, params=params).json()
-
-    def get_sleep_data(self, cdate: str) -> Dict[str, Any]:
-        """Return sleep data for current user."""
-
-        url = f"{self.garmin_connect_daily_sleep_url}/{self.display_name}"
-        params = {"date": str(cdate), "nonSleepBufferMinutes": 60}
-
-        logger.debug("Requesting sleep data")
-
-        return self.modern_rest_client.get(url, params=params).json()
-
-    def get_stress_data(self, cdate: str) -> Dict[str, Any]:
-        """Return stress data for current user."""
-
-        url = f"{self.garmin_connect_daily_stress_url}/{cdate}"
-        logger.debug("Requesting stress data")
-
-        return self.modern_rest_client.get(url).json()
-
-    def get_rhr_day(self, cdate: str) -> Dict[str, Any]:
-        """Return resting heartrate data for current user."""
-
-        params = {"fromDate": str(cdate), "untilDate": str(cdate), "metricId": 60}
-        url = f"{self.garmin_connect_rhr}/{self.display_name}"
-        logger.debug("Requesting resting heartrate data")
-
-        return self.modern_rest_client.get(url, params=params).json()
-
-    def get_devices(self) -> Dict[str, Any]:
-        """Return available devices for the current user account."""
-
-        url = self.garmin_connect_devices_url
-        logger.debug("Requesting devices")
-
-        return self.modern_rest_client.get(url).json()
-
-    def get_device_settings(self, device_id: str) -> Dict[str, Any]:
-        """Return device settings for device with 'device_id'."""
-
-        url = f"{self.garmin_connect_device_url}/device-info/settings/{device_id}"
-        logger.debug("Requesting device settings")
-
-        return self.modern_rest_client.get(url).json()
-
     def get_device_alarms(self) -> Dict[str, Any]:
         """Get list of active alarms from all devices."""
 
         logger.debug("Requesting device alarms")
 
-        alarms = []
         devices = self.get_devices()
-        for device in devices:
-            device_settings = self.get_device_settings(device["deviceId"])
-            alarms += device_settings["alarms"]
-        return alarms
-
-    def get_device_last_used(self):
-        """Return device last used."""
-
-        url = f"{self.garmin_connect_device_url}/mylastused"
-        logger.debug("Requesting device last used")
-
-        return self.modern_rest_client.get(url).json()
-
-    def get_activities(self, start, limit):
-        """Return available activities."""
+        if not devices:
+            return []
 
-        url = self.garmin_connect_activities
-        params = {"start": str(start), "limit": str(limit)}
-        logger.debug("Requesting activities")
+        with ThreadPoolExecutor(max_workers=min(8, len(devices))) as executor:
+            devices_settings = executor.map(
+                lambda device: self.get_device_settings(device["deviceId"]), devices
+            )
 
-        return self.modern_rest_client.get(url, params=params).json()
+        return [
+            alarm
+            for device_settings in devices_settings
+            for alarm in device_settings["alarms"]
+        ]
 
     def get_last_activity(self):
         """Return last activity."""
@@ -624,6 +996,24 @@ class Garmin:
 
         return None
 
+    def get_recent_activity_details(self, limit):
+        """
+        Return details of the last 'limit' activities, requested concurrently.
+        Prefer this over calling get_activity_details in a loop.
+        """
+
+        activities = self.get_activities(0, limit)
+        if not activities:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(8, len(activities))) as executor:
+            return list(
+                executor.map(
+                    lambda activity: self.get_activity_details(activity["activityId"]),
+                    activities,
+                )
+            )
+
     def get_activities_by_date(self, startdate, enddate, activitytype=None):
         """
         Fetch available activities between specific dates
@@ -650,11 +1040,11 @@ class Garmin:
         if activitytype:
             params["activityType"] = str(activitytype)
 
-        print(f"Requesting activities by date from {startdate} to {enddate}")
+        logger.debug("Requesting activities by date from %s to %s", startdate, enddate)
         while True:
             params["start"] = str(start)
-            logger.debug(f"Requesting activities {start} to {start+limit}")
-            act = self.modern_rest_client.get(url, params=params).json()
+            logger.debug("Requesting activities %d to %d", start, start + limit)
+            act = self.modern_rest_client.get_json(url, params=params)
             if act:
                 activities.extend(act)
                 start = start + limit
@@ -672,12 +1062,9 @@ class Garmin:
         KML = auto()
         CSV = auto()
 
-    def download_activity(self, activity_id, dl_fmt=ActivityDownloadFormat.TCX):
-        """
-        Downloads activity in requested format and returns the raw bytes. For
-        "Original" will return the zip file content, up to user to extract it.
-        "CSV" will return a csv of the splits.
-        """
+    def _activity_download_url(self, activity_id, dl_fmt):
+        """Return the download url of an activity in the requested format."""
+
         activity_id = str(activity_id)
         urls = {
             Garmin.ActivityDownloadFormat.ORIGINAL: f"{self.garmin_connect_fit_download}/{activity_id}",
@@ -688,96 +1075,505 @@ class Garmin:
         }
         if dl_fmt not in urls:
             raise ValueError(f"Unexpected value {dl_fmt} for dl_fmt")
-        url = urls[dl_fmt]
 
+        return urls[dl_fmt]
+
+    def download_activity(
+        self,
+        activity_id,
+        dl_fmt=ActivityDownloadFormat.TCX,
+        *,
+        dest=None,
+        stream=False,
+        chunk_size=65536,
+    ):
+        """
+        Downloads activity in requested format and returns the raw bytes. For
+        "Original" will return the zip file content, up to user to extract it.
+        "CSV" will return a csv of the splits.
+        :param dest: (Optional) Path or binary file object to write the download
+                     to in chunks, instead of returning the bytes
+        :param stream: (Optional) Return an iterator over the chunks instead
+        :param chunk_size: (Optional) Size of the chunks when writing to dest or
+                           streaming
+        """
+        url = self._activity_download_url(activity_id, dl_fmt)
         logger.debug("Downloading activities from %s", url)
 
-        return self.modern_rest_client.get(url).content
+        if dest is None and not stream:
+            return self.modern_rest_client.get(url).content
 
-    def get_activity_splits(self, activity_id):
-        """Return activity splits."""
+        response = self.modern_rest_client.get_stream(url)
+        chunks = _iter_content(response, chunk_size)
+        if dest is None:
+            return chunks
 
-        activity_id = str(activity_id)
-        url = f"{self.garmin_connect_activity}/{activity_id}/splits"
-        logger.debug("Requesting splits for activity id %s", activity_id)
+        _write_chunks(chunks, dest)
 
-        return self.modern_rest_client.get(url).json()
+    def logout(self):
+        """Log user out of session."""
 
-    def get_activity_split_summaries(self, activity_id):
-        """Return activity split summaries."""
+        self.modern_rest_client.get(self.garmin_connect_logout)
 
-        activity_id = str(activity_id)
-        url = f"{self.garmin_connect_activity}/{activity_id}/split_summaries"
-        logger.debug("Requesting split summaries for activity id %s", activity_id)
+    def close(self):
+        """Close the http sessions."""
+
+        if self._http is not None:
+            self._http.close()
+        self.session.close()
+        self._auth_session.close()
+
+
+# Endpoints returning their json as is: method name -> (docstring, function
+# returning the url and params for the method arguments, seconds to cache)
+_ENDPOINTS = {
+    "get_steps_data": (
+        "Fetch available steps data 'cDate' format 'YYYY-mm-dd'.",
+        lambda self, cdate: (
+            self._url_steps,
+            {"date": str(cdate)},
+        ),
+        None,
+    ),
+    "get_heart_rates": (
+        "Fetch available heart rates data 'cDate' format 'YYYY-mm-dd'.",
+        lambda self, cdate: (
+            self._url_heart_rates,
+            {"date": str(cdate)},
+        ),
+        None,
+    ),
+    "get_body_composition": (
+        "Return available body composition data for 'startdate' format 'YYYY-mm-dd' through enddate 'YYYY-mm-dd'.",
+        lambda self, startdate, enddate=None: (
+            self.garmin_connect_weight_url,
+            {
+                "startDate": str(startdate),
+                "endDate": str(startdate if enddate is None else enddate),
+            },
+        ),
+        None,
+    ),
+    "get_max_metrics": (
+        "Return available max metric data for 'cdate' format 'YYYY-mm-dd'.",
+        lambda self, cdate: (
+            f"{self.garmin_connect_metrics_url}/{cdate}/{cdate}",
+            None,
+        ),
+        None,
+    ),
+    "get_hydration_data": (
+        "Return available hydration data 'cdate' format 'YYYY-mm-dd'.",
+        lambda self, cdate: (
+            f"{self.garmin_connect_daily_hydration_url}/{cdate}",
+            None,
+        ),
+        None,
+    ),
+    "get_respiration_data": (
+        "Return available respiration data 'cdate' format 'YYYY-mm-dd'.",
+        lambda self, cdate: (
+            f"{self.garmin_connect_daily_respiration_url}/{cdate}",
+            None,
+        ),
+        None,
+    ),
+    "get_spo2_data": (
+        "Return available SpO2 data 'cdate' format 'YYYY-mm-dd'.",
+        lambda self, cdate: (f"{self.garmin_connect_daily_spo2_url}/{cdate}", None),
+        None,
+    ),
+    "get_personal_record": (
+        "Return personal records for current user.",
+        lambda self: (
+            self._url_personal_record,
+            None,
+        ),
+        300,
+    ),
+    "get_earned_badges": (
+        "Return earned badges for current user.",
+        lambda self: (self.garmin_connect_earned_badges_url, None),
+        300,
+    ),
+    "get_adhoc_challenges": (
+        "Return adhoc challenges for current user.",
+        lambda self, start, limit: (
+            self.garmin_connect_adhoc_challenges_url,
+            {"start": str(start), "limit": str(limit)},
+        ),
+        None,
+    ),
+    "get_badge_challenges": (
+        "Return badge challenges for current user.",
+        lambda self, start, limit: (
+            self.garmin_connect_badge_challenges_url,
+            {"start": str(start), "limit": str(limit)},
+        ),
+        None,
+    ),
+    "get_available_badge_challenges": (
+        "Return available badge challenges.",
+        lambda self, start, limit: (
+            self.garmin_connect_available_badge_challenges_url,
+            {"start": str(start), "limit": str(limit)},
+        ),
+        None,
+    ),
+    "get_non_completed_badge_challenges": (
+        "Return badge non-completed challenges for current user.",
+        lambda self, start, limit: (
+            self.garmin_connect_non_completed_badge_challenges_url,
+            {"start": str(start), "limit": str(limit)},
+        ),
+        None,
+    ),
+    "get_sleep_data": (
+        "Return sleep data for current user.",
+        lambda self, cdate: (
+            self._url_sleep,
+            {"date": str(cdate), "nonSleepBufferMinutes": 60},
+        ),
+        None,
+    ),
+    "get_stress_data": (
+        "Return stress data for current user.",
+        lambda self, cdate: (f"{self.garmin_connect_daily_stress_url}/{cdate}", None),
+        None,
+    ),
+    "get_rhr_day": (
+        "Return resting heartrate data for current user.",
+        lambda self, cdate: (
+            self._url_rhr,
+            {"fromDate": str(cdate), "untilDate": str(cdate), "metricId": 60},
+        ),
+        None,
+    ),
+    "get_devices": (
+        "Return available devices for the current user account.",
+        lambda self: (self.garmin_connect_devices_url, None),
+        300,
+    ),
+    "get_device_settings": (
+        "Return device settings for device with 'device_id'.",
+        lambda self, device_id: (
+            f"{self.garmin_connect_device_url}/device-info/settings/{device_id}",
+            None,
+        ),
+        300,
+    ),
+    "get_device_last_used": (
+        "Return device last used.",
+        lambda self: (f"{self.garmin_connect_device_url}/mylastused", None),
+        None,
+    ),
+    "get_activities": (
+        "Return available activities.",
+        lambda self, start, limit: (
+            self.garmin_connect_activities,
+            {"start": str(start), "limit": str(limit)},
+        ),
+        None,
+    ),
+    "get_activity_splits": (
+        "Return activity splits.",
+        lambda self, activity_id: (
+            f"{self.garmin_connect_activity}/{activity_id}/splits",
+            None,
+        ),
+        None,
+    ),
+    "get_activity_split_summaries": (
+        "Return activity split summaries.",
+        lambda self, activity_id: (
+            f"{self.garmin_connect_activity}/{activity_id}/split_summaries",
+            None,
+        ),
+        None,
+    ),
+    "get_activity_weather": (
+        "Return activity weather.",
+        lambda self, activity_id: (
+            f"{self.garmin_connect_activity}/{activity_id}/weather",
+            None,
+        ),
+        None,
+    ),
+    "get_activity_hr_in_timezones": (
+        "Return activity heartrate in timezones.",
+        lambda self, activity_id: (
+            f"{self.garmin_connect_activity}/{activity_id}/hrTimeInZones",
+            None,
+        ),
+        None,
+    ),
+    "get_activity_evaluation": (
+        "Return activity self evaluation details.",
+        lambda self, activity_id: (
+            f"{self.garmin_connect_activity}/{activity_id}",
+            None,
+        ),
+        None,
+    ),
+    "get_activity_details": (
+        "Return activity details.",
+        lambda self, activity_id, maxchart=2000, maxpoly=4000: (
+            f"{self.garmin_connect_activity}/{activity_id}/details",
+            {"maxChartSize": str(maxchart), "maxPolylineSize": str(maxpoly)},
+        ),
+        None,
+    ),
+    "get_activity_gear": (
+        "Return gears used for activity id.",
+        lambda self, activity_id: (
+            self.garmin_connect_gear,
+            {"activityId": str(activity_id)},
+        ),
+        None,
+    ),
+}
+
+
+def _make_fetch(name, doc, endpoint, seconds=None):
+    """Return a Garmin method returning the json of an _ENDPOINTS entry."""
+
+    def fetch(self, *args, **kwargs):
+        url, params = endpoint(self, *args, **kwargs)
+        logger.debug("Requesting %s", name)
+
+        return self.modern_rest_client.get_json(url, params=params)
+
+    fetch.__name__ = name
+    fetch.__qualname__ = f"Garmin.{name}"
+    fetch.__doc__ = doc
+    fetch.__signature__ = inspect.signature(endpoint)
+    if seconds is not None:
+        fetch = ttl_cache(seconds)(fetch)
+
+    return fetch
+
+
+for _name, (_doc, _endpoint, _seconds) in _ENDPOINTS.items():
+    setattr(Garmin, _name, _make_fetch(_name, _doc, _endpoint, _seconds))
+
+
+class AsyncGarmin(Garmin):
+    """Class for fetching data from Garmin Connect using asyncio.
+
+    Every method doing a request returns an awaitable, so fetching many days
+    or activities can be done concurrently with asyncio.gather().
+    Login still runs the synchronous SSO flow, in the default executor.
+    """
 
-        return self.modern_rest_client.get(url).json()
+    def __init__(self, email, password, is_cn=False, session_data=None):
+        """Create a new class instance."""
+        super().__init__(email, password, is_cn, session_data)
 
-    def get_activity_weather(self, activity_id):
-        """Return activity weather."""
+        self.modern_rest_client = AsyncApiClient(
+            self.session,
+            self.garmin_connect_modern_url,
+            aditional_headers=self.garmin_headers,
+        )
+        self.modern_rest_client.http = self._http
 
-        activity_id = str(activity_id)
-        url = f"{self.garmin_connect_activity}/{activity_id}/weather"
-        logger.debug("Requesting weather for activity id %s", activity_id)
+    async def __aenter__(self):
+        return self
 
-        return self.modern_rest_client.get(url).json()
+    async def __aexit__(self, *exc_info):
+        await self.close()
 
-    def get_activity_hr_in_timezones(self, activity_id):
-        """Return activity heartrate in timezones."""
+    async def login(self):
+        # Keep the cookies of earlier async calls, and pick up the new ones
+        # in a new aiohttp session afterwards
+        await self.modern_rest_client.close()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, super().login)
 
-        activity_id = str(activity_id)
-        url = f"{self.garmin_connect_activity}/{activity_id}/hrTimeInZones"
-        logger.debug("Requesting split summaries for activity id %s", activity_id)
+    def save_state(self, path):
+        """Save the state like Garmin.save_state, including the async cookies."""
 
-        return self.modern_rest_client.get(url).json()
+        self.modern_rest_client.sync_cookies()
+        super().save_state(path)
 
-    def get_activity_evaluation(self, activity_id):
-        """Return activity self evaluation details."""
+    async def fetch_range(self, fn, dates, concurrency=8):
+        """
+        Return the results of awaiting fn(date) for every date, in order
+        :param fn: Method to call, e.g. api.get_sleep_data
+        :param dates: Iterable of arguments for fn, e.g. strings YYYY-MM-DD
+        :param concurrency: Maximum number of requests running at once
+        :return: list of results
+        """
 
-        activity_id = str(activity_id)
+        semaphore = asyncio.Semaphore(concurrency)
 
-        url = f"{self.garmin_connect_activity}/{activity_id}"
-        logger.debug("Requesting self evaluation data for activity id %s", activity_id)
+        async def fetch(cdate):
+            async with semaphore:
+                return await fn(cdate)
 
-        return self.modern_rest_client.get(url).json()
+        return await asyncio.gather(*(fetch(cdate) for cdate in dates))
 
-    def get_activity_details(self, activity_id, maxchart=2000, maxpoly=4000):
-        """Return activity details."""
+    @ttl_cache(seconds=10)
+    async def get_user_summary(
+        self, cdate: str, strict=False
+    ) -> Union[Dict[str, Any], "structs.UserSummary"]:
+        """
+        Return user activity summary for 'cdate' format 'YYYY-mm-dd'.
+        With 'strict' return it as a structs.UserSummary, needs msgspec.
+        """
 
-        activity_id = str(activity_id)
-        params = {
-            "maxChartSize": str(maxchart),
-            "maxPolylineSize": str(maxpoly),
-        }
-        url = f"{self.garmin_connect_activity}/{activity_id}/details"
-        logger.debug("Requesting details for activity id %s", activity_id)
+        url, params, struct_type = self._user_summary_request(cdate, strict)
+        logger.debug("Requesting user summary")
 
-        return self.modern_rest_client.get(url, params=params).json()
+        if struct_type is not None:
+            response = await self.modern_rest_client.get_struct(
+                url, struct_type, params=params
+            )
+        else:
+            response = await self.modern_rest_client.get_json(url, params=params)
 
-    def get_activity_gear(self, activity_id):
-        """Return gears used for activity id."""
+        return self._check_user_summary(response)
 
-        activity_id = str(activity_id)
+    async def get_stats_and_body(self, cdate):
+        """Return activity data and body composition (compat for garminconnect)."""
+
+        stats, body = await asyncio.gather(
+            self.get_stats(cdate), self.get_body_composition(cdate)
+        )
+
+        return {**stats, **body["totalAverage"]}
+
+    async def get_device_alarms(self) -> Dict[str, Any]:
+        """Get list of active alarms from all devices."""
+
+        logger.debug("Requesting device alarms")
+
+        devices = await self.get_devices()
+        devices_settings = await asyncio.gather(
+            *(self.get_device_settings(device["deviceId"]) for device in devices)
+        )
+
+        return [
+            alarm
+            for device_settings in devices_settings
+            for alarm in device_settings["alarms"]
+        ]
+
+    async def get_last_activity(self):
+        """Return last activity."""
+
+        activities = await self.get_activities(0, 1)
+        if activities:
+            return activities[-1]
+
+        return None
+
+    async def get_recent_activity_details(self, limit):
+        """
+        Return details of the last 'limit' activities, requested concurrently.
+        Prefer this over awaiting get_activity_details in a loop.
+        """
+
+        activities = await self.get_activities(0, limit)
+
+        return await self.fetch_range(
+            self.get_activity_details,
+            [activity["activityId"] for activity in activities],
+        )
+
+    async def get_activities_by_date(
+        self, startdate, enddate, activitytype=None, concurrency=4
+    ):
+        """
+        Fetch available activities between specific dates
+        :param startdate: String in the format YYYY-MM-DD
+        :param enddate: String in the format YYYY-MM-DD
+        :param activitytype: (Optional) Type of activity you are searching
+                             Possible values are [cycling, running, swimming,
+                             multi_sport, fitness_equipment, hiking, walking, other]
+        :param concurrency: (Optional) Number of pages requested at once
+        :return: list of JSON activities
+        """
+
+        activities = []
+        start = 0
+        limit = 20
+        url = self.garmin_connect_activities
         params = {
-            "activityId": str(activity_id),
+            "startDate": str(startdate),
+            "endDate": str(enddate),
+            "limit": str(limit),
         }
-        url = self.garmin_connect_gear
-        logger.debug("Requesting gear for activity_id %s", activity_id)
+        if activitytype:
+            params["activityType"] = str(activitytype)
+
+        async def fetch_page(page_start):
+            logger.debug(
+                "Requesting activities %d to %d", page_start, page_start + limit
+            )
+            return await self.modern_rest_client.get_json(
+                url, params={**params, "start": str(page_start)}
+            )
 
-        return self.modern_rest_client.get(url, params=params).json()
+        # Request the next pages together, the first empty page ends the list
+        # and the pages requested after it are discarded
+        while True:
+            page_starts = range(start, start + concurrency * limit, limit)
+            pages = await self.fetch_range(fetch_page, page_starts, concurrency)
+            for act in pages:
+                if not act:
+                    return activities
+                activities.extend(act)
+            start = start + concurrency * limit
+
+    async def download_activity(
+        self,
+        activity_id,
+        dl_fmt=Garmin.ActivityDownloadFormat.TCX,
+        *,
+        dest=None,
+        stream=False,
+        chunk_size=65536,
+    ):
+        """
+        Downloads activity in requested format and returns the raw bytes. For
+        "Original" will return the zip file content, up to user to extract it.
+        "CSV" will return a csv of the splits.
+        :param dest: (Optional) Path or binary file object to write the download
+                     to in chunks, instead of returning the bytes
+        :param stream: (Optional) Return an async iterator over the chunks instead
+        :param chunk_size: (Optional) Size of the chunks when writing to dest or
+                           streaming
+        """
+        url = self._activity_download_url(activity_id, dl_fmt)
+        logger.debug("Downloading activities from %s", url)
 
-    def logout(self):
-        """Log user out of session."""
+        if dest is None and not stream:
+            return await self.modern_rest_client.get_content(url)
 
-        self.modern_rest_client.get(self.garmin_connect_logout)
+        # Connect and check the status now, like the synchronous version
+        response = await self.modern_rest_client.get_stream(url)
+        chunks = _aiter_content(response, chunk_size)
+        if dest is None:
+            return chunks
 
+        if hasattr(dest, "write"):
+            async for chunk in chunks:
+                dest.write(chunk)
+        else:
+            with open(dest, "wb") as fp:
+                async for chunk in chunks:
+                    fp.write(chunk)
 
-class GarminConnectConnectionError(Exception):
-    """Raised when communication ended in error."""
+    async def logout(self):
+        """Log user out of session."""
 
+        self.modern_rest_client.sync_cookies()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, super().logout)
 
-class GarminConnectTooManyRequestsError(Exception):
-    """Raised when rate limit is exceeded."""
+    async def close(self):
+        """Close the http sessions."""
 
+        await self.modern_rest_client.close()
+        super().close()
 
-class GarminConnectAuthenticationError(Exception):
-    """Raised when authentication is failed."""
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+"""Typed responses of Garmin Connect endpoints with a stable schema, needs msgspec."""
+
+from typing import Optional
+
+import msgspec
+
+
+class UserSummary(msgspec.Struct, rename="camel"):
+    """User activity summary of a day."""
+
+    calendar_date: Optional[str] = None
+    user_profile_id: Optional[int] = None
+    privacy_protected: Optional[bool] = None
+    total_steps: Optional[int] = None
+    daily_step_goal: Optional[int] = None
+    total_distance_meters: Optional[float] = None
+    total_kilocalories: Optional[float] = None
+    active_kilocalories: Optional[float] = None
+    bmr_kilocalories: Optional[float] = None
+    floors_ascended: Optional[float] = None
+    floors_descended: Optional[float] = None
+    min_heart_rate: Optional[int] = None
+    max_heart_rate: Optional[int] = None
+    resting_heart_rate: Optional[int] = None
+    average_stress_level: Optional[int] = None
+    max_stress_level: Optional[int] = None
+    body_battery_highest_value: Optional[int] = None
+    body_battery_lowest_value: Optional[int] = None
+    body_battery_most_recent_value: Optional[int] = None
+    moderate_intensity_minutes: Optional[int] = None
+    vigorous_intensity_minutes: Optional[int] = None
+    intensity_minutes_goal: Optional[int] = None
+    active_seconds: Optional[int] = None
+    highly_active_seconds: Optional[int] = None
+    sedentary_seconds: Optional[int] = None
+    sleeping_seconds: Optional[int] = None
@@ -30,7 +30,14 @@ setup(
     name="garminconnect",
     keywords=["garmin connect", "api", "client"],
     license="MIT license",
-    install_requires=["requests","cloudscraper", "python-dotenv],
+    install_requires=["requests","cloudscraper", "python-dotenv", "urllib3>=1.26"],
+    extras_require={
+        "async": ["aiohttp"],
+        "brotli": ["brotli"],
+        "orjson": ["orjson"],
+        "http2": ["httpx[http2]"],
+        "structs": ["msgspec"],
+    },
     long_description_content_type="text/markdown",
     long_description=readme,
     url="https://github.com/cyberjunky/python-garminconnect",